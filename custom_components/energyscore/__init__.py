@@ -12,6 +12,7 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
 from .const import CONF_ROLLING_HOURS, CONF_TRESHOLD, DOMAIN
+from .storage import async_remove_history
 
 PLATFORMS = [Platform.SENSOR]
 
@@ -44,6 +45,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored history of a deleted config entry."""
+    await async_remove_history(hass, entry.data["unique_id"])
+
+
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the EnergyScore integration from yaml configuration."""
     hass.data.setdefault(DOMAIN, {})
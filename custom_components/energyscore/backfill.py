@@ -0,0 +1,104 @@
+"""Backfill of EnergyScore history from the recorder"""
+import asyncio
+import datetime
+from functools import partial
+import logging
+from typing import Iterator
+
+from homeassistant.components.recorder import get_instance, history
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import BACKFILL, DOMAIN
+from .history import RESOLUTION
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Seconds to collect the backfill requests of all instances over
+BACKFILL_DELAY = 1
+
+
+def hourly_samples(states: list[State], start: int, end: int) -> dict[int, float]:
+    """Source values as the sensors would have sampled them, from the start to the
+    end hour. The value of an hour is the state in effect at the end of the hour,
+    rounded as the sensors round their readings. Hours where the state was not
+    numeric are left out."""
+    samples = {}
+    value = None
+    index = 0
+    for hour in range(start, end + 1):
+        hour_end = (hour + 1) * RESOLUTION
+        while index < len(states) and states[index].last_updated.timestamp() < hour_end:
+            try:
+                value = round(float(states[index].state), 2)
+            except ValueError:
+                value = None
+            index += 1
+        if value is not None:
+            samples[hour] = value
+    return samples
+
+
+def usage_since(
+    last: float | None, samples: dict[int, float]
+) -> Iterator[tuple[int, float]]:
+    """Energy usage of each sampled hour since the last reading.
+    A reading lower than the one before is a reset of the energy sensor."""
+    for hour, value in sorted(samples.items()):
+        if last is not None:
+            yield hour, value - last if value >= last else value
+        last = value
+
+
+@callback
+def async_get_backfill(hass: HomeAssistant) -> "RecorderBackfill | None":
+    """Returns the shared recorder backfill, or None without a recorder"""
+    if "recorder" not in hass.config.components:
+        return None
+    data = hass.data.setdefault(DOMAIN, {})
+    if BACKFILL not in data:
+        data[BACKFILL] = RecorderBackfill(hass)
+    return data[BACKFILL]
+
+
+class RecorderBackfill:
+    """Reads the recorded history of source entities for all instances.
+    Requests arriving within BACKFILL_DELAY seconds are answered by one query
+    for all their entities, run in the recorder executor."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._future: asyncio.Future | None = None
+        self._requests: dict[str, datetime.datetime] = {}
+
+    async def async_history(
+        self, entity_ids: list[str], start: datetime.datetime
+    ) -> dict[str, list[State]]:
+        """Recorded states of the entities since start, oldest first"""
+        for entity_id in entity_ids:
+            self._requests[entity_id] = min(start, self._requests.get(entity_id, start))
+        if self._future is None:
+            self._future = self.hass.loop.create_future()
+            async_call_later(self.hass, BACKFILL_DELAY, self._async_fetch)
+        states = await asyncio.shield(self._future)
+        return {entity_id: states.get(entity_id, []) for entity_id in entity_ids}
+
+    async def _async_fetch(self, _now: datetime.datetime) -> None:
+        future, self._future = self._future, None
+        requests, self._requests = self._requests, {}
+        _LOGGER.debug("Backfilling %s entities from the recorder", len(requests))
+        try:
+            states = await get_instance(self.hass).async_add_executor_job(
+                partial(
+                    history.get_significant_states,
+                    self.hass,
+                    min(requests.values()),
+                    entity_ids=list(requests),
+                    significant_changes_only=False,
+                    no_attributes=True,
+                )
+            )
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Could not read the history of %s", list(requests))
+            states = {}
+        future.set_result(states)
@@ -20,7 +20,10 @@ from .const import (
     CONF_PRICE_ENTITY,
     CONF_ROLLING_HOURS,
     CONF_TRESHOLD,
+    CONF_UPDATE_MODE,
     DOMAIN,
+    UPDATE_MODE_POLLING,
+    UPDATE_MODES,
 )
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -67,6 +70,7 @@ class EnergyScoreConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # Set the default options:
             self.options[CONF_TRESHOLD] = 0
             self.options[CONF_ROLLING_HOURS] = 24
+            self.options[CONF_UPDATE_MODE] = UPDATE_MODE_POLLING
 
             return self.async_create_entry(
                 title=self.data["name"], data=self.data, options=self.options
@@ -108,6 +112,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required(
                     CONF_ROLLING_HOURS, default=self.current_options[CONF_ROLLING_HOURS]
                 ): vol.All(int, vol.Range(min=2, max=168)),
+                vol.Required(
+                    CONF_UPDATE_MODE,
+                    default=self.current_options.get(
+                        CONF_UPDATE_MODE, UPDATE_MODE_POLLING
+                    ),
+                ): vol.In(UPDATE_MODES),
             }
         )
 
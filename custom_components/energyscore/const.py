@@ -12,14 +12,23 @@ CONF_PRICE_ENTITY = "price_entity"
 CONF_ENERGY_ENTITY = "energy_entity"
 CONF_ROLLING_HOURS = "rolling_hours"
 CONF_TRESHOLD = "energy_treshold"
+CONF_UPDATE_MODE = "update_mode"
+
+# Update modes
+UPDATE_MODE_EVENT = "event"
+UPDATE_MODE_POLLING = "polling"
+UPDATE_MODES = [UPDATE_MODE_POLLING, UPDATE_MODE_EVENT]
 
 # Other
+BACKFILL = "backfill"
 COST_AVG = "average_cost"
 COST_MAX = "maximum_cost"
 COST_MIN = "minimum_cost"
 ENERGY = "total_energy"
 ENERGY_TODAY = "energy_today"
+HISTORY_STORES = "history_stores"
 LAST_ENERGY = "last_updated_energy"
 LAST_UPDATED = "last_updated"
+PRICE_COORDINATORS = "price_coordinators"
 PRICES = "price"
 QUALITY = "quality"
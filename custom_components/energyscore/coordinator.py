@@ -0,0 +1,177 @@
+"""Coordinators sharing data between EnergyScore sensors"""
+import logging
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+import numpy as np
+
+from .const import DOMAIN, PRICE_COORDINATORS
+from .engine import ScoreAccumulator, load_accumulators
+from .history import HourlyRingBuffer
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def normalise_price(price_dict) -> dict:
+    """Normalises price dict"""
+    if price_dict == {}:
+        return {}
+    max_value = max(price_dict.values())
+    min_value = min(price_dict.values())
+    if max_value == min_value:
+        return {key: 1 for key, value in price_dict.items()}
+    return {
+        key: (max_value - value) / (max_value - min_value)
+        for key, value in price_dict.items()
+    }
+
+
+@callback
+def async_get_price_coordinator(
+    hass: HomeAssistant, price_entity: str
+) -> "PriceCoordinator":
+    """Returns the shared price coordinator of a price entity"""
+    coordinators = hass.data.setdefault(DOMAIN, {}).setdefault(PRICE_COORDINATORS, {})
+    if price_entity not in coordinators:
+        coordinators[price_entity] = PriceCoordinator(hass, price_entity)
+    return coordinators[price_entity]
+
+
+class PriceCoordinator:
+    """Hourly price timeline of one price entity.
+    The sensors of all instances using the price entity subscribe to the same
+    coordinator, so the prices are kept and serialized once, and the score
+    accumulators of all instances are reloaded in one batch."""
+
+    def __init__(self, hass: HomeAssistant, price_entity: str) -> None:
+        self.hass = hass
+        self.price_entity = price_entity
+        self.prices = HourlyRingBuffer(1)
+        self._accumulators: list[tuple[ScoreAccumulator, HourlyRingBuffer]] = []
+        self._cache: dict = {}
+        self._horizons: list[int] = []
+        # Increased when other than the newest price changes
+        self.revision = 0
+
+    @property
+    def retention(self) -> int:
+        """Number of hours the subscribers need"""
+        return max(self._horizons, default=1)
+
+    @callback
+    def async_subscribe(self, hours: int) -> Callable[[], None]:
+        """Subscribes to the timeline, keeping at least the given hours"""
+        self._horizons.append(hours)
+        self._async_resize()
+
+        @callback
+        def _async_unsubscribe() -> None:
+            self._horizons.remove(hours)
+            if not self._horizons:
+                self.hass.data[DOMAIN][PRICE_COORDINATORS].pop(self.price_entity, None)
+            else:
+                self._async_resize()
+
+        return _async_unsubscribe
+
+    @callback
+    def async_register_accumulator(
+        self, accumulator: ScoreAccumulator, totals: HourlyRingBuffer
+    ) -> Callable[[], None]:
+        """Registers the score accumulator and energy totals of an instance"""
+        entry = (accumulator, totals)
+        self._accumulators.append(entry)
+
+        @callback
+        def _async_unregister() -> None:
+            self._accumulators.remove(entry)
+
+        return _async_unregister
+
+    @callback
+    def async_load_accumulators(self, end: int) -> None:
+        """Reloads the stale score accumulators of all instances, ending at end.
+        Accumulators with the same number of hours are loaded in one batch."""
+        groups: dict[int, list[tuple[ScoreAccumulator, HourlyRingBuffer]]] = {}
+        for accumulator, totals in self._accumulators:
+            if accumulator.end is None or accumulator.revision != self.revision:
+                groups.setdefault(accumulator.hours, []).append((accumulator, totals))
+        for hours, group in groups.items():
+            views = [totals.view(end, hours + 1) for _, totals in group]
+            load_accumulators(
+                [accumulator for accumulator, _ in group],
+                end,
+                np.stack([values for values, _ in views]),
+                np.stack([present for _, present in views]),
+                *self.window(end - hours + 1, end),
+            )
+            for accumulator, _ in group:
+                accumulator.revision = self.revision
+        _LOGGER.debug(
+            "%s - Loaded %s score accumulators",
+            self.price_entity,
+            sum(len(group) for group in groups.values()),
+        )
+
+    @callback
+    def _async_resize(self) -> None:
+        if self.prices.capacity != self.retention:
+            self.prices.resize(self.retention)
+            self._cache.clear()
+            self.revision += 1
+
+    @callback
+    def async_restore(self, prices: dict) -> int | None:
+        """Adds restored prices to the timeline without overwriting newer data.
+        Returns the newest restored hour."""
+        newest = self.prices.restore(prices, overwrite=False)
+        self._cache.clear()
+        self.revision += 1
+        return newest
+
+    @callback
+    def async_unpack(self, prices: dict) -> int | None:
+        """Adds packed prices to the timeline without overwriting newer data.
+        Returns the newest restored hour."""
+        newest = self.prices.unpack(prices, overwrite=False)
+        self._cache.clear()
+        self.revision += 1
+        return newest
+
+    @callback
+    def async_backfill(self, prices: dict[int, float]) -> None:
+        """Adds prices of hours missing in the timeline"""
+        if missing := {
+            hour: price for hour, price in prices.items() if hour not in self.prices
+        }:
+            for hour, price in sorted(missing.items()):
+                self.prices.set(hour, price)
+            self._cache.clear()
+            self.revision += 1
+
+    @callback
+    def async_set_price(self, hour: int, price: float) -> None:
+        """Sets the price of an hour"""
+        if hour not in self.prices or self.prices.get(hour) != price:
+            if self.prices.last_hour is not None and hour < self.prices.last_hour:
+                self.revision += 1
+            self.prices.set(hour, price)
+            self._cache.clear()
+
+    def window(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray]:
+        """Prices and their presence from start to end hour, both included"""
+        if ("window", start, end) not in self._cache:
+            self._cache[("window", start, end)] = self.prices.view(end, end - start + 1)
+        return self._cache[("window", start, end)]
+
+    def packed(self, start: int, end: int) -> dict:
+        """Prices from start to end hour as a packed series"""
+        return self.prices.pack(end, end - start + 1)
+
+    def serialized(self, start: int, end: int) -> dict:
+        """Prices from start to end hour with string keys for the state attributes"""
+        if ("serialized", start, end) not in self._cache:
+            self._cache[("serialized", start, end)] = self.prices.serialize(
+                end, end - start + 1
+            )
+        return self._cache[("serialized", start, end)]
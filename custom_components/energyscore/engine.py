@@ -0,0 +1,320 @@
+"""Incremental scoring engine for EnergyScore"""
+from collections import Counter, deque
+from typing import Iterator
+
+import numpy as np
+
+
+def _reading_key(total: float) -> float | None:
+    """Rejected readings are counted as one distinct reading"""
+    return None if np.isnan(total) else total
+
+
+def hourly_usage(
+    totals: np.ndarray, present: np.ndarray, treshold: float | np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Energy usage per hour from consecutive hourly totals along the last axis.
+    Returns the usage of all but the first hour, and where the usage is valid.
+    A present NaN total is a rejected reading, and is followed by a reset."""
+    previous = totals[..., :-1]
+    current = totals[..., 1:]
+    # Check if the energy sensor is resetting
+    reset = np.isnan(previous) | (current < previous)
+    usage = np.where(reset, current, current - previous)
+    valid = present[..., :-1] & present[..., 1:] & ~np.isnan(current)
+    # Remove all energy usage below treshold
+    valid &= usage >= treshold
+    return usage, valid
+
+
+def load_accumulators(
+    accumulators: list["ScoreAccumulator"],
+    end: int,
+    totals: np.ndarray,
+    totals_present: np.ndarray,
+    prices: np.ndarray,
+    price_present: np.ndarray,
+) -> None:
+    """Recomputes the windows of accumulators with the same number of hours and
+    prices in one batch. Each row of totals holds the totals of the hours
+    end - hours to end of one accumulator, and prices the shared prices of the
+    hours end - hours + 1 to end. The sums of all accumulators are computed by
+    array operations and one matrix-vector product."""
+    hours = accumulators[0].hours
+    totals = np.atleast_2d(totals)
+    totals_present = np.atleast_2d(totals_present)
+    tresholds = np.array([[accumulator.treshold] for accumulator in accumulators])
+    usage, valid = hourly_usage(totals, totals_present, tresholds)
+    usage = np.where(valid, usage, 0.0)
+    matched = np.where(price_present, usage, 0.0)
+    sums_usage = usage.sum(axis=1)
+    sums_matched = matched.sum(axis=1)
+    sums_weighted = matched @ np.where(price_present, prices, 0.0)
+    matched_hours = np.count_nonzero(valid & price_present, axis=1)
+
+    # Hours, prices and readings are shared by all rows
+    price_hours = np.arange(end - hours + 1, end + 1)
+    reading_hours = np.arange(end - hours, end + 1)
+    window_prices = dict(
+        zip(price_hours[price_present].tolist(), prices[price_present].tolist())
+    )
+    for row, accumulator in enumerate(accumulators):
+        accumulator.clear()
+        accumulator.end = end
+        accumulator._prices = dict(window_prices)
+        for hour, price in window_prices.items():
+            accumulator._price_window.set(hour, price)
+        row_valid = valid[row]
+        accumulator._usage = dict(
+            zip(price_hours[row_valid].tolist(), usage[row][row_valid].tolist())
+        )
+        row_present = totals_present[row]
+        accumulator._readings = {
+            hour: _reading_key(total)
+            for hour, total in zip(
+                reading_hours[row_present].tolist(), totals[row][row_present].tolist()
+            )
+        }
+        accumulator._reading_counts = Counter(accumulator._readings.values())
+        accumulator._matched_hours = int(matched_hours[row])
+        accumulator._sum_usage = float(sums_usage[row])
+        accumulator._sum_matched = float(sums_matched[row])
+        accumulator._sum_weighted = float(sums_weighted[row])
+
+
+class SlidingWindowAggregate:
+    """Minimum, maximum, sum and count of a time indexed series in a sliding window.
+    Values are added in time order and evicted from the oldest end. The minimum
+    and maximum are kept by monotonic deques, increasing and decreasing values
+    respectively, so adding and evicting are amortised constant time.
+    The newest value may be replaced until a newer one is added, and is kept
+    apart from the deques until then. Adding an older value rebuilds the window."""
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        """Removes all values"""
+        self._max: deque[tuple[int, float]] = deque()
+        self._min: deque[tuple[int, float]] = deque()
+        self._newest: tuple[int, float] | None = None
+        self._sum = 0.0
+        self._values: deque[tuple[int, float]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._values) + (self._newest is not None)
+
+    @property
+    def count(self) -> int:
+        """Number of values in the window"""
+        return len(self)
+
+    @property
+    def max(self) -> float | None:
+        """Maximum value in the window"""
+        values = [self._max[0][1]] if self._max else []
+        if self._newest is not None:
+            values.append(self._newest[1])
+        return max(values, default=None)
+
+    @property
+    def min(self) -> float | None:
+        """Minimum value in the window"""
+        values = [self._min[0][1]] if self._min else []
+        if self._newest is not None:
+            values.append(self._newest[1])
+        return min(values, default=None)
+
+    @property
+    def sum(self) -> float:
+        """Sum of the values in the window"""
+        if self._newest is None:
+            return self._sum
+        return self._sum + self._newest[1]
+
+    def items(self) -> Iterator[tuple[int, float]]:
+        """Times and values in the window, oldest first"""
+        yield from self._values
+        if self._newest is not None:
+            yield self._newest
+
+    def set(self, time: int, value: float) -> None:
+        """Sets the value of a time"""
+        if self._newest is not None:
+            if time == self._newest[0]:
+                self._newest = (time, value)
+                return
+            if time < self._newest[0]:
+                items = dict(self.items())
+                items[time] = value
+                self.clear()
+                for item in sorted(items.items()):
+                    self.set(*item)
+                return
+            self._append(*self._newest)
+        self._newest = (time, value)
+
+    def _append(self, time: int, value: float) -> None:
+        self._values.append((time, value))
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((time, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((time, value))
+
+    def evict(self, start: int) -> None:
+        """Removes the values older than start"""
+        while self._values and self._values[0][0] < start:
+            self._sum -= self._values.popleft()[1]
+        if not self._values:
+            self._sum = 0.0  # No rounding errors left behind
+        for extremes in (self._min, self._max):
+            while extremes and extremes[0][0] < start:
+                extremes.popleft()
+        if self._newest is not None and self._newest[0] < start:
+            self._newest = None
+
+
+class ScoreAccumulator:
+    """Running sums of the EnergyScore of a rolling window of hours.
+
+    The score is the normalised price weighted by the share of energy used:
+        sum((max - price) / (max - min) * usage) / sum(usage)
+    which equals
+        (max * sum(matched usage) - sum(price * matched usage))
+        / ((max - min) * sum(usage))
+    where matched usage is the usage of hours with a price. Keeping these sums,
+    and the price minimum and maximum in a sliding window aggregate, updating an
+    hour is amortised constant time."""
+
+    def __init__(self, hours: int, treshold: float) -> None:
+        self.hours = hours
+        self.treshold = treshold
+        self.revision: int | None = None
+        self.clear()
+
+    def clear(self) -> None:
+        """Removes all hours"""
+        self.end: int | None = None
+        self._matched_hours = 0
+        self._price_window = SlidingWindowAggregate()
+        self._prices: dict[int, float] = {}
+        self._reading_counts: Counter = Counter()
+        self._readings: dict[int, float | None] = {}
+        self._sum_matched = 0.0
+        self._sum_usage = 0.0
+        self._sum_weighted = 0.0
+        self._usage: dict[int, float] = {}
+
+    @property
+    def distinct_readings(self) -> int:
+        """Number of distinct energy readings in the window"""
+        return len(self._reading_counts)
+
+    @property
+    def price_hours(self) -> int:
+        """Number of hours with a price"""
+        return len(self._prices)
+
+    @property
+    def usage_hours(self) -> int:
+        """Number of hours with valid energy usage above the treshold"""
+        return len(self._usage)
+
+    def load(
+        self,
+        end: int,
+        totals: tuple[np.ndarray, np.ndarray],
+        prices: tuple[np.ndarray, np.ndarray],
+    ) -> None:
+        """Recomputes the window from the totals of the hours end - hours to end
+        and the prices of the hours end - hours + 1 to end, with their presence"""
+        load_accumulators([self], end, totals[0], totals[1], *prices)
+
+    def advance(self, end: int) -> None:
+        """Moves the window to end at the given hour, evicting older hours"""
+        if self.end is not None and end <= self.end:
+            return
+        if self.end is None or end - self.end > self.hours:
+            self.clear()
+        else:
+            for hour in range(self.end - self.hours + 1, end - self.hours + 1):
+                self._remove_usage(hour)
+                self._remove_price(hour)
+                self._remove_reading(hour - 1)
+            self._price_window.evict(end - self.hours + 1)
+        self.end = end
+
+    def set_reading(self, hour: int, total: float) -> None:
+        """Sets the energy total of an hour, NaN if the reading was rejected"""
+        self._remove_reading(hour)
+        key = self._readings[hour] = _reading_key(total)
+        self._reading_counts[key] += 1
+
+    def set_usage(self, hour: int, previous: float | None, current: float) -> None:
+        """Sets the usage of an hour from the totals of the hour and the one before.
+        The previous total is None if missing, and NaN if the reading was rejected."""
+        self._remove_usage(hour)
+        if previous is None or np.isnan(current):
+            return
+        # Check if the energy sensor is resetting
+        if np.isnan(previous) or current < previous:
+            usage = current
+        else:
+            usage = current - previous
+        if usage < self.treshold:
+            return
+        self._usage[hour] = usage
+        self._sum_usage += usage
+        if (price := self._prices.get(hour)) is not None:
+            self._matched_hours += 1
+            self._sum_matched += usage
+            self._sum_weighted += price * usage
+
+    def set_price(self, hour: int, price: float) -> None:
+        """Sets the price of an hour"""
+        if self._prices.get(hour) == price:
+            return
+        self._remove_price(hour)
+        self._prices[hour] = price
+        if (usage := self._usage.get(hour)) is not None:
+            self._matched_hours += 1
+            self._sum_matched += usage
+            self._sum_weighted += price * usage
+        self._price_window.set(hour, price)
+
+    def _remove_reading(self, hour: int) -> None:
+        if hour in self._readings:
+            key = self._readings.pop(hour)
+            self._reading_counts[key] -= 1
+            if not self._reading_counts[key]:
+                del self._reading_counts[key]
+
+    def _remove_usage(self, hour: int) -> None:
+        if (usage := self._usage.pop(hour, None)) is not None:
+            self._sum_usage -= usage
+            if (price := self._prices.get(hour)) is not None:
+                self._matched_hours -= 1
+                self._sum_matched -= usage
+                self._sum_weighted -= price * usage
+
+    def _remove_price(self, hour: int) -> None:
+        if (price := self._prices.pop(hour, None)) is not None:
+            if (usage := self._usage.get(hour)) is not None:
+                self._matched_hours -= 1
+                self._sum_matched -= usage
+                self._sum_weighted -= price * usage
+
+    def score(self) -> float:
+        """The EnergyScore of the window, from 0 to 1"""
+        if not self._matched_hours:
+            return 0.0
+        max_price = self._price_window.max
+        min_price = self._price_window.min
+        if max_price == min_price:
+            return self._sum_matched / self._sum_usage
+        return (max_price * self._sum_matched - self._sum_weighted) / (
+            (max_price - min_price) * self._sum_usage
+        )
@@ -0,0 +1,264 @@
+"""Hourly history buffers for EnergyScore"""
+import base64
+import datetime
+from typing import Iterator
+
+from homeassistant.util import dt
+import numpy as np
+
+# Seconds per point in the packed series
+RESOLUTION = 3600
+
+
+def hour_index(time: datetime.datetime) -> int:
+    """Integer UTC hour of a datetime"""
+    return int(time.timestamp() // 3600)
+
+
+def serialize_time(time: datetime.datetime) -> str:
+    """Datetime string used as key in the state attributes"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+
+def hour_start(index: int) -> datetime.datetime:
+    """Start of the local hour with the given hour index"""
+    start = dt.as_local(dt.utc_from_timestamp(index * 3600)).replace(
+        minute=0, second=0, microsecond=0
+    )
+    # Local hours do not start on whole UTC hours in all time zones
+    if start.timestamp() < index * 3600:
+        start += datetime.timedelta(hours=1)
+    return start
+
+
+def pack_series(start: int, values: np.ndarray, present: np.ndarray) -> dict:
+    """Packs hourly values from the start hour into a compact JSON friendly dict.
+    Values are little endian float64 and presence is a bit mask, both base64."""
+    return {
+        "start": start * RESOLUTION,
+        "resolution": RESOLUTION,
+        "values": base64.b64encode(values.astype("<f8").tobytes()).decode(),
+        "mask": base64.b64encode(np.packbits(present).tobytes()).decode(),
+    }
+
+
+def unpack_series(data: dict) -> tuple[int, np.ndarray, np.ndarray]:
+    """Start hour, values and presence of a packed series"""
+    if data.get("resolution") != RESOLUTION:
+        raise ValueError(f"Unsupported resolution {data.get('resolution')}")
+    values = np.frombuffer(base64.b64decode(data["values"]), dtype="<f8")
+    present = np.unpackbits(
+        np.frombuffer(base64.b64decode(data["mask"]), dtype=np.uint8),
+        count=len(values),
+    ).astype(bool)
+    return int(data["start"] // RESOLUTION), values.astype(float), present
+
+
+def pack_attribute(data: dict) -> dict:
+    """Packs a series in the datetime string keyed attribute layout"""
+    items = sorted(
+        [
+            (hour_index(time), value)
+            for key, value in data.items()
+            if (time := dt.parse_datetime(key)) is not None
+        ],
+        key=lambda item: item[0],
+    )
+    buffer = HourlyRingBuffer(items[-1][0] - items[0][0] + 1 if items else 1)
+    for hour, value in items:
+        buffer.set(hour, value)
+    return buffer.pack()
+
+
+class HourlyRingBuffer:
+    """Fixed capacity ring buffer of hourly values indexed by integer UTC hour.
+    Every value is written twice into arrays of double capacity, so any window of
+    up to capacity hours ending at the newest hour is a contiguous slice.
+    Missing hours are masked by present, and None is stored as a present NaN.
+    The serialized view is cached until the buffer changes."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.last_hour: int | None = None
+        self._serialized: tuple[tuple, dict] | None = None
+        self._values = np.full(2 * capacity, np.nan)
+        self._present = np.zeros(2 * capacity, dtype=bool)
+
+    def __contains__(self, hour: int) -> bool:
+        return self._retained(hour) and bool(self._present[hour % self.capacity])
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._present[: self.capacity]))
+
+    def _retained(self, hour: int) -> bool:
+        return self.last_hour is not None and (
+            self.last_hour - self.capacity < hour <= self.last_hour
+        )
+
+    def get(self, hour: int) -> float | None:
+        """Value of an hour, or None if missing"""
+        if hour not in self:
+            return None
+        value = self._values[hour % self.capacity]
+        return None if np.isnan(value) else float(value)
+
+    def set(self, hour: int, value: float | None) -> None:
+        """Sets the value of an hour, evicting the hours that fall out"""
+        if self.last_hour is None:
+            self.last_hour = hour
+        elif hour > self.last_hour:
+            for stale in range(
+                self.last_hour + 1, min(hour, self.last_hour + self.capacity) + 1
+            ):
+                self._write(stale, np.nan, False)
+            self.last_hour = hour
+        elif hour <= self.last_hour - self.capacity:
+            return
+        self._write(hour, np.nan if value is None else value, True)
+
+    def _write(self, hour: int, value: float, present: bool) -> None:
+        i = hour % self.capacity
+        self._values[i] = self._values[i + self.capacity] = value
+        self._present[i] = self._present[i + self.capacity] = present
+        self._serialized = None
+
+    def resize(self, capacity: int) -> None:
+        """Changes the capacity, keeping the newest hours"""
+        if capacity == self.capacity:
+            return
+        items = list(self.items())
+        self.__init__(capacity)
+        for hour, value in items:
+            self.set(hour, value)
+
+    def view(self, end: int, hours: int) -> tuple[np.ndarray, np.ndarray]:
+        """Values and presence of the hours up to end, oldest first.
+        Windows ending at the newest hour are views without copying."""
+        if hours > self.capacity:
+            raise ValueError(f"Window of {hours} hours exceeds {self.capacity}")
+        start = end - hours + 1
+        if self.last_hour is None or end < start:
+            return np.full(hours, np.nan), np.zeros(hours, dtype=bool)
+        if end == self.last_hour:
+            i = start % self.capacity
+            return self._values[i : i + hours], self._present[i : i + hours]
+
+        values = np.full(hours, np.nan)
+        present = np.zeros(hours, dtype=bool)
+        for offset, hour in enumerate(range(start, end + 1)):
+            if hour in self:
+                values[offset] = self._values[hour % self.capacity]
+                present[offset] = True
+        return values, present
+
+    def items(self) -> Iterator[tuple[int, float | None]]:
+        """Present hours and values, oldest first"""
+        if self.last_hour is None:
+            return
+        for hour in range(self.last_hour - self.capacity + 1, self.last_hour + 1):
+            if hour in self:
+                yield hour, self.get(hour)
+
+    def serialize(self, end: int | None = None, hours: int | None = None) -> dict:
+        """Values with local datetime strings as keys, for the state attributes"""
+        if self._serialized is not None and self._serialized[0] == (end, hours):
+            return self._serialized[1]
+        if end is None or hours is None:
+            items = self.items()
+        else:
+            items = (
+                (hour, self.get(hour))
+                for hour in range(end - hours + 1, end + 1)
+                if hour in self
+            )
+        serialized = {serialize_time(hour_start(hour)): value for hour, value in items}
+        self._serialized = ((end, hours), serialized)
+        return serialized
+
+    def restore(self, data: dict, overwrite: bool = True) -> int | None:
+        """Adds values with datetime string keys, e.g. restored state attributes.
+        Returns the newest hour of the data."""
+        items = [
+            (hour_index(time), value)
+            for key, value in data.items()
+            if (time := dt.parse_datetime(key)) is not None
+        ]
+        for hour, value in sorted(items, key=lambda item: item[0]):
+            if overwrite or hour not in self:
+                self.set(hour, value)
+        return max((hour for hour, _ in items), default=None)
+
+    def pack(self, end: int | None = None, hours: int | None = None) -> dict:
+        """Packed series of the buffer, or of the window of hours up to end"""
+        if self.last_hour is None:
+            return pack_series(0, np.empty(0), np.empty(0, dtype=bool))
+        if end is None or hours is None:
+            end, hours = self.last_hour, self.capacity
+        values, present = self.view(end, hours)
+        if not present.any():
+            return pack_series(0, np.empty(0), np.empty(0, dtype=bool))
+        # Leading missing hours are left out
+        first = int(np.argmax(present))
+        return pack_series(end - hours + 1 + first, values[first:], present[first:])
+
+    def unpack(self, data: dict, overwrite: bool = True) -> int | None:
+        """Adds the values of a packed series. Returns the newest hour of the data."""
+        start, values, present = unpack_series(data)
+        hours = np.flatnonzero(present)
+        for offset in hours:
+            hour = start + int(offset)
+            if overwrite or hour not in self:
+                value = values[offset]
+                self.set(hour, None if np.isnan(value) else float(value))
+        return start + int(hours[-1]) if len(hours) else None
+
+
+class LastReading:
+    """Last energy reading of a sensor.
+    The reading is kept as a datetime and serialized once per new reading."""
+
+    def __init__(self) -> None:
+        self.time: datetime.datetime | None = None
+        self.value: float | None = None
+        self._serialized: dict | None = {}
+
+    def readings(self, time: datetime.datetime, value: float) -> dict:
+        """The last and a new reading, keyed by time"""
+        if self.time is None:
+            return {time: value}
+        return {self.time: self.value, time: value}
+
+    def set(self, time: datetime.datetime, value: float) -> None:
+        """Replaces the last reading"""
+        self.time = time
+        self.value = value
+        self._serialized = None
+
+    def serialize(self) -> dict:
+        """The last reading with a string key, for the state attributes"""
+        if self._serialized is None:
+            self._serialized = {serialize_time(self.time): self.value}
+        return self._serialized
+
+    def pack(self) -> dict:
+        """The last reading as an epoch and a value"""
+        if self.time is None:
+            return {}
+        return {"time": self.time.timestamp(), "value": self.value}
+
+    def unpack(self, data: dict) -> None:
+        """Restores a packed reading"""
+        if data:
+            self.set(dt.as_local(dt.utc_from_timestamp(data["time"])), data["value"])
+
+    def restore(self, data: dict) -> None:
+        """Restores the newest reading of a serialized dict, keeping the dict"""
+        readings = {
+            time: value
+            for key, value in data.items()
+            if (time := dt.parse_datetime(key)) is not None
+        }
+        if readings:
+            self.time = max(readings)
+            self.value = readings[self.time]
+        self._serialized = data
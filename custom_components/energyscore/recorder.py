@@ -0,0 +1,11 @@
+"""Integration platform for recorder"""
+from homeassistant.core import HomeAssistant, callback
+
+from .const import ENERGY, PRICES
+
+
+@callback
+def exclude_attributes(hass: HomeAssistant) -> set[str]:
+    """Exclude the rolling history from being recorded in the database.
+    The history is persisted in the history store instead."""
+    return {ENERGY, PRICES}
@@ -1,5 +1,6 @@
 """Sensor platform for energyscore."""
 import datetime
+from functools import partial
 import logging
 from typing import Any, Callable
 
@@ -15,21 +16,33 @@ from homeassistant.const import (
     STATE_UNAVAILABLE,
     STATE_UNKNOWN,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity import DeviceInfo, get_unit_of_measurement
 import homeassistant.helpers.entity_registry as er
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_change,
+)
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 from homeassistant.util import dt
 import numpy as np
 import voluptuous as vol
 
+from .backfill import (
+    RecorderBackfill,
+    async_get_backfill,
+    hourly_samples,
+    usage_since,
+)
 from .const import (
     CONF_ENERGY_ENTITY,
     CONF_PRICE_ENTITY,
     CONF_ROLLING_HOURS,
     CONF_TRESHOLD,
+    CONF_UPDATE_MODE,
     COST_AVG,
     COST_MAX,
     COST_MIN,
@@ -43,13 +56,32 @@ from .const import (
     LAST_UPDATED,
     PRICES,
     QUALITY,
+    UPDATE_MODE_POLLING,
+    UPDATE_MODES,
+)
+from .coordinator import (
+    PriceCoordinator,
+    async_get_price_coordinator,
+    normalise_price,
+)
+from .engine import ScoreAccumulator, SlidingWindowAggregate
+from .history import (
+    HourlyRingBuffer,
+    LastReading,
+    hour_index,
+    hour_start,
+    serialize_time,
 )
+from .storage import HistoryStore, async_get_history_store
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 # Time between updating data
 SCAN_INTERVAL = datetime.timedelta(minutes=10)
 
+# Seconds to coalesce source changes over in event driven update mode
+EVENT_COOLDOWN = 30
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_NAME): cv.string,
@@ -60,6 +92,9 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_ROLLING_HOURS, default=24): vol.All(
             int, vol.Range(min=2, max=168)
         ),
+        vol.Optional(CONF_UPDATE_MODE, default=UPDATE_MODE_POLLING): vol.In(
+            UPDATE_MODES
+        ),
     }
 )
 
@@ -75,13 +110,14 @@ async def async_setup_entry(
     config = hass.data[DOMAIN][config_entry.entry_id]
     energy_treshold = config_entry.options.get(CONF_TRESHOLD)
     rolling_hours = config_entry.options.get(CONF_ROLLING_HOURS)
+    update_mode = config_entry.options.get(CONF_UPDATE_MODE, UPDATE_MODE_POLLING)
     _LOGGER.debug("Config: %s", config)
     _LOGGER.debug("Options: %s", config_entry.options)
 
     sensors = [
-        EnergyScore(hass, config, energy_treshold, rolling_hours),
-        Cost(hass, config),
-        PotentialSavings(hass, config),
+        EnergyScore(hass, config, energy_treshold, rolling_hours, update_mode),
+        Cost(hass, config, update_mode),
+        PotentialSavings(hass, config, update_mode),
     ]
     async_add_entities(sensors, update_before_add=False)
 
@@ -95,27 +131,67 @@ async def async_setup_platform(
     """Set up sensors from YAML config"""
     energy_treshold = config[CONF_TRESHOLD]
     rolling_hours = config[CONF_ROLLING_HOURS]
+    update_mode = config[CONF_UPDATE_MODE]
     _LOGGER.debug("Config: %s", config)
     sensors = [
-        EnergyScore(hass, config, energy_treshold, rolling_hours),
-        Cost(hass, config),
-        PotentialSavings(hass, config),
+        EnergyScore(hass, config, energy_treshold, rolling_hours, update_mode),
+        Cost(hass, config, update_mode),
+        PotentialSavings(hass, config, update_mode),
     ]
     async_add_entities(sensors, update_before_add=False)
 
 
-def normalise_price(price_dict) -> dict:
-    """Normalises price dict"""
-    if price_dict == {}:
-        return {}
-    max_value = max(price_dict.values())
-    min_value = min(price_dict.values())
-    if max_value == min_value:
-        return {key: 1 for key, value in price_dict.items()}
-    return {
-        key: (max_value - value) / (max_value - min_value)
-        for key, value in price_dict.items()
-    }
+def async_track_sources(entity: SensorEntity, entity_ids: list[str]) -> None:
+    """Updates an entity when its sources change and at every new hour.
+    Bursts of source changes are coalesced into one update by a debouncer."""
+    debouncer = Debouncer(
+        entity.hass,
+        _LOGGER,
+        cooldown=EVENT_COOLDOWN,
+        immediate=True,
+        function=partial(entity.async_update_ha_state, True),
+    )
+
+    @callback
+    def _async_schedule_update(*_: Any) -> None:
+        entity.hass.async_create_task(debouncer.async_call())
+
+    @callback
+    def _async_source_changed(event: Event) -> None:
+        new_state = event.data.get("new_state")
+        old_state = event.data.get("old_state")
+        if (
+            new_state is not None
+            and old_state is not None
+            and new_state.state == old_state.state
+        ):
+            return  # Only attributes changed
+        _async_schedule_update()
+
+    entity.async_on_remove(
+        async_track_state_change_event(entity.hass, entity_ids, _async_source_changed)
+    )
+    entity.async_on_remove(
+        async_track_time_change(entity.hass, _async_schedule_update, minute=0, second=0)
+    )
+    entity.async_on_remove(debouncer.async_cancel)
+
+
+@callback
+def async_start_backfill(entity: SensorEntity, backfill_job) -> None:
+    """Runs the recorder backfill of an entity in the background"""
+    if (backfill := async_get_backfill(entity.hass)) is not None:
+        task = entity.hass.async_create_task(backfill_job(backfill))
+        entity.async_on_remove(task.cancel)
+
+
+def day_gap(last_energy: LastReading, now: datetime.datetime) -> int | None:
+    """First hour of today without energy readings, if there is a gap"""
+    if last_energy.time is None or last_energy.time.date() != now.date():
+        return hour_index(dt.start_of_local_day(now))
+    if now - last_energy.time > 2 * SCAN_INTERVAL:
+        return hour_index(last_energy.time)
+    return None
 
 
 def normalise_energy(energy_dict) -> dict:
@@ -126,22 +202,6 @@ def normalise_energy(energy_dict) -> dict:
     return {key: value / sum_values for key, value in energy_dict.items()}
 
 
-def calculate_hourly_energy_usage(energy_dict: dict) -> dict:
-    """Calculate energy usage per hour from total"""
-    energy_usage = {}
-    for key, value in energy_dict.items():
-        previous = key - datetime.timedelta(hours=1)
-        if previous in energy_dict and energy_dict[key] is not None:
-            # Check if the energy sensor is resetting
-            if energy_dict[previous] is None or (value < energy_dict[previous]):
-                energy_usage[key] = value
-            else:
-                energy_usage[key] = value - energy_dict[previous]
-        elif previous in energy_dict and energy_dict[key] is not None:
-            energy_usage[key] = value
-    return energy_usage
-
-
 def calculate_energy_usage(energy_dict: dict) -> float:
     """Calculate energy usage based on two consecutive energy readings"""
     if len(energy_dict) == 2 and all(
@@ -163,27 +223,36 @@ class EnergyScore(SensorEntity, RestoreEntity):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = "%"
 
-    def __init__(self, hass, config, energy_treshold, rolling_hours):
+    def __init__(
+        self,
+        hass,
+        config,
+        energy_treshold,
+        rolling_hours,
+        update_mode=UPDATE_MODE_POLLING,
+    ):
         self._attr_icon: str = ICON
+        self._attr_should_poll = update_mode == UPDATE_MODE_POLLING
         self._attr_unique_id = config.get(CONF_UNIQUE_ID)
 
+        self._accumulator = ScoreAccumulator(rolling_hours, energy_treshold)
         self._energy = None
         self._energy_entity = config[CONF_ENERGY_ENTITY]
+        self._history_store: HistoryStore | None = None
         self.hass = hass  # TODO: needed?
         self._name = f"{config[CONF_NAME]} EnergyScore"
-        self._norm_energy = np.array(None)
-        self._norm_prices = np.array(None)
         self._price = None
+        self._price_coordinator: PriceCoordinator | None = None
         self._price_entity = config[CONF_PRICE_ENTITY]
         self._rolling_hours = rolling_hours
         self._state = 100
+        self._totals = HourlyRingBuffer(rolling_hours + 1)
         self._treshold = energy_treshold
+        self._window_end: int | None = None
         self.attr = {
             CONF_ENERGY_ENTITY: self._energy_entity,
             CONF_PRICE_ENTITY: self._price_entity,
             QUALITY: 0,
-            ENERGY: {},
-            PRICES: {},
             LAST_UPDATED: None,
         }
 
@@ -208,46 +277,120 @@ class EnergyScore(SensorEntity, RestoreEntity):
 
     @property
     def extra_state_attributes(self):
-        return self.attr
+        return {
+            **self.attr,
+            ENERGY: self._totals.serialize(),
+            PRICES: self.serialized_prices(),
+        }
+
+    def price_window(self) -> tuple[int, int]:
+        """First and last hour of the rolling price window"""
+        return self._window_end - self._rolling_hours + 1, self._window_end
+
+    def serialized_prices(self) -> dict:
+        """Prices in the rolling window with string keys"""
+        if self._price_coordinator is None or self._window_end is None:
+            return {}
+        return self._price_coordinator.serialized(*self.price_window())
+
+    def stored_history(self) -> dict:
+        """Rolling history to persist in the history store, as packed series"""
+        history = {ENERGY: self._totals.pack()}
+        if self._window_end is not None:
+            history[PRICES] = self._price_coordinator.packed(*self.price_window())
+        return history
 
     async def async_added_to_hass(self) -> None:
-        """Restore last state"""
+        """Restore last state, and the rolling history from the history store"""
         _LOGGER.debug("Trying to restore: %s", self._name)
         await super().async_added_to_hass()
+        self._price_coordinator = async_get_price_coordinator(
+            self.hass, self._price_entity
+        )
+        self.async_on_remove(
+            self._price_coordinator.async_subscribe(self._rolling_hours)
+        )
+        self.async_on_remove(
+            self._price_coordinator.async_register_accumulator(
+                self._accumulator, self._totals
+            )
+        )
+        self._history_store = async_get_history_store(self.hass, self._attr_unique_id)
+        history = await self._history_store.async_load("energyscore")
+        newest_price = None
+        self.async_on_remove(
+            self._history_store.async_register("energyscore", self.stored_history)
+        )
         if (
             last_state := await self.async_get_last_state()
         ) and last_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE):
             self._state = last_state.state
-            for attribute in [ENERGY, PRICES, LAST_UPDATED, QUALITY]:
+            for attribute in [LAST_UPDATED, QUALITY]:
                 if attribute in last_state.attributes:
                     self.attr[attribute] = last_state.attributes[attribute]
+            if not history:
+                # Migrate history recorded as attributes by older versions
+                self._totals.restore(last_state.attributes.get(ENERGY, {}))
+                newest_price = self._price_coordinator.async_restore(
+                    last_state.attributes.get(PRICES, {})
+                )
             _LOGGER.debug("Restored %s", self._name)
         else:
             _LOGGER.debug("Was not able to restore %s", self._name)
 
-    def process_new_data(self):
-        """Processes the update data"""
-        now = dt.now().replace(
-            minute=0, second=0, microsecond=0
-        )  # TZ aware datetime obj based on user settings
-
-        # Parse datetimes from strings
-        for i in [ENERGY, PRICES]:
-            self.attr[i] = {
-                dt.parse_datetime(key): value
-                for key, value in self.attr[i].items()
-                if isinstance(key, str)
-            }
-
-        # Add new data, need to check declining energy first
-        previous = now - datetime.timedelta(hours=1)
-        if (
-            previous in self.attr[ENERGY]
-            and self.attr[ENERGY][previous] is not None
-            and self._energy.state < self.attr[ENERGY][previous]
-        ):
-            _state_class = self._energy.attributes.get("state_class")
-            _last_reset = self._energy.attributes.get("last_reset")
+        if history:
+            self._totals.unpack(history[ENERGY])
+            newest_price = (
+                self._price_coordinator.async_unpack(history[PRICES])
+                if PRICES in history
+                else None
+            )
+        if self._totals.last_hour is not None or newest_price is not None:
+            self._window_end = max(self._totals.last_hour or 0, newest_price or 0)
+
+        if not self.should_poll:
+            async_track_sources(self, [self._energy_entity, self._price_entity])
+        async_start_backfill(self, self._async_backfill)
+
+    async def _async_backfill(self, backfill: RecorderBackfill) -> None:
+        """Fills hours missing in the rolling window from the recorder"""
+        now = hour_index(dt.now())
+        start = now - self._rolling_hours
+        missing = [
+            hour
+            for hour in range(start, now)
+            if hour not in self._totals
+            or (hour > start and hour not in self._price_coordinator.prices)
+        ]
+        if not missing:
+            return
+        states = await backfill.async_history(
+            [self._energy_entity, self._price_entity], hour_start(missing[0])
+        )
+        totals = hourly_samples(states[self._energy_entity], missing[0], now - 1)
+        prices = hourly_samples(states[self._price_entity], missing[0], now - 1)
+        energy = self.hass.states.get(self._energy_entity)
+        for hour, total in totals.items():
+            if hour not in self._totals:
+                self.add_total(hour, total, energy.attributes if energy else {})
+        self._price_coordinator.async_backfill(prices)
+        _LOGGER.debug(
+            "%s - Backfilled %s energy totals and %s prices",
+            self._name,
+            len(totals),
+            len(prices),
+        )
+        if totals or prices:
+            # The window is reloaded at the update
+            self._accumulator.clear()
+            self.async_schedule_update_ha_state(True)
+
+    def add_total(self, hour: int, total: float, attributes) -> None:
+        """Adds the energy total of an hour, need to check declining energy first"""
+        previous = self._totals.get(hour - 1)
+        if previous is not None and total < previous:
+            _state_class = attributes.get("state_class")
+            _last_reset = attributes.get("last_reset")
             if _last_reset is not None:
                 _last_reset = dt.parse_datetime(_last_reset).replace(
                     minute=0, second=0, microsecond=0
@@ -257,7 +400,7 @@ class EnergyScore(SensorEntity, RestoreEntity):
             if _state_class == "total_increasing" or (
                 _state_class == "total" and _last_reset is not None
             ):
-                self.attr[ENERGY][now] = self._energy.state
+                self._totals.set(hour, total)
             else:
                 if _state_class == "total":
                     _warn_text = """, but there is no last_reset attribute to confirm that the sensor is expected to decline the value."""
@@ -269,38 +412,34 @@ class EnergyScore(SensorEntity, RestoreEntity):
                     _state_class,
                     _warn_text,
                 )
-                self.attr[ENERGY][now] = None
+                self._totals.set(hour, None)
         else:
-            self.attr[ENERGY][now] = self._energy.state
-        self.attr[PRICES][now] = self._price.state
-
-        # Calculate energy data per hour from total:
-        _energy_usage = calculate_hourly_energy_usage(self.attr[ENERGY])
-
-        # Remove all energy usage below treshold:
-        _energy_usage = {k: v for k, v in _energy_usage.items() if v >= self._treshold}
+            self._totals.set(hour, total)
 
-        # Clean out old data:
-        def cutoff(data: dict, hours: int) -> dict:
-            """Cuts off old energy and price data"""
-            cut_hours = now - datetime.timedelta(hours=hours)
-            return {time: value for (time, value) in data.items() if time > cut_hours}
-
-        _energy_usage = cutoff(_energy_usage, self._rolling_hours)
-        self.attr[PRICES] = cutoff(self.attr[PRICES], self._rolling_hours)
-        self.attr[ENERGY] = cutoff(self.attr[ENERGY], self._rolling_hours + 1)
+    def process_new_data(self):
+        """Processes the update data"""
+        now = hour_index(dt.now())
 
+        # Add new data
+        self.add_total(now, self._energy.state, self._energy.attributes)
+        self._price_coordinator.async_set_price(now, self._price.state)
+        self._window_end = now
+        self._update_accumulator(now)
         _LOGGER.debug(
-            "%s - Calculated energy usage: %s",
+            "%s - Hours with price: %s, with energy usage: %s",
             self._name,
-            [round(val, 2) for key, val in _energy_usage.items()],
+            self._accumulator.price_hours,
+            self._accumulator.usage_hours,
         )
 
         # Calculate quality and break out if applicable
-        q = min(len(self.attr[PRICES]), len(_energy_usage)) / self._rolling_hours
+        q = (
+            min(self._accumulator.price_hours, self._accumulator.usage_hours)
+            / self._rolling_hours
+        )
         self.attr[QUALITY] = round(q, 2)
         _LOGGER.debug("%s - Quality: %s", self._name, self.attr[QUALITY])
-        if self.attr[QUALITY] == 0 or len(set(self.attr[ENERGY].values())) == 1:
+        if self.attr[QUALITY] == 0 or self._accumulator.distinct_readings == 1:
             _LOGGER.debug(
                 "%s - Not able to calculate energy use in the last %s hours",
                 self._name,
@@ -310,21 +449,33 @@ class EnergyScore(SensorEntity, RestoreEntity):
             # and if so, should the return really be 100?
             return 100
 
-        # Normalise and intersect the data
-        _norm_prices = normalise_price(self.attr[PRICES])
-        _norm_energies = normalise_energy(_energy_usage)
-        _intersection = self.attr[PRICES].keys() & _energy_usage.keys()
-        _price_array = np.array([_norm_prices[x] for x in _intersection])
-        _energy_array = np.array([_norm_energies[x] for x in _intersection])
-        _LOGGER.debug("%s - Norm prices: %s", self._name, np.round(_price_array, 2))
-        _LOGGER.debug("%s - Norm energy: %s", self._name, np.round(_energy_array, 2))
-
         # Calculate the energyscore
-        _score = np.dot(_price_array, _energy_array)
+        _score = self._accumulator.score()
         _LOGGER.debug("%s - Score: %s", self._name, _score)
 
         return int(_score * 100)
 
+    def _update_accumulator(self, now: int) -> None:
+        """Adds the current hour to the score accumulator.
+        The window is reloaded when it is new, or older prices have changed,
+        together with the other instances using the price entity."""
+        if (
+            self._accumulator.end is None
+            or self._accumulator.revision != self._price_coordinator.revision
+        ):
+            self._price_coordinator.async_load_accumulators(now)
+            return
+
+        self._accumulator.advance(now)
+        total = self._totals.get(now)
+        total = np.nan if total is None else total
+        previous = self._totals.get(now - 1)
+        if previous is None and now - 1 in self._totals:
+            previous = np.nan  # Rejected reading
+        self._accumulator.set_reading(now, total)
+        self._accumulator.set_usage(now, previous, total)
+        self._accumulator.set_price(now, self._price_coordinator.prices.get(now))
+
     async def async_update(self):
         """Updates the sensor"""
 
@@ -359,16 +510,7 @@ class EnergyScore(SensorEntity, RestoreEntity):
                 )
             else:
                 self.attr[LAST_UPDATED] = dt.now()
-
-                # Datatimes needs to be converted to strings in state attributes
-                self.attr[PRICES] = {
-                    key.strftime("%Y-%m-%dT%H:%M:%S%z"): val
-                    for key, val in self.attr[PRICES].items()
-                }
-                self.attr[ENERGY] = {
-                    key.strftime("%Y-%m-%dT%H:%M:%S%z"): val
-                    for key, val in self.attr[ENERGY].items()
-                }
+                self._history_store.async_schedule_save()
 
 
 class Cost(SensorEntity, RestoreEntity):
@@ -376,15 +518,18 @@ class Cost(SensorEntity, RestoreEntity):
 
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
 
-    def __init__(self, hass: HomeAssistant, config):
+    def __init__(self, hass: HomeAssistant, config, update_mode=UPDATE_MODE_POLLING):
         self._attr_icon: str = ICON_COST
+        self._attr_should_poll = update_mode == UPDATE_MODE_POLLING
         self._attr_unit_of_measurement = None
         self._attr_unique_id = f"{config.get(CONF_UNIQUE_ID)}_cost"
         self._energy_entity = config[CONF_ENERGY_ENTITY]
         self._name = f"{config[CONF_NAME]} Cost"
         self._price_entity = config[CONF_PRICE_ENTITY]
         self._state = None
-        self.attr = {LAST_ENERGY: {}, LAST_UPDATED: None}
+        self.attr = {LAST_UPDATED: None}
+        self.last_energy = LastReading()
+        self._history_store: HistoryStore | None = None
         self.config = config
         self.energy = None
         self.energy_usage = None
@@ -412,7 +557,7 @@ class Cost(SensorEntity, RestoreEntity):
 
     @property
     def extra_state_attributes(self):
-        return self.attr
+        return {**self.attr, LAST_ENERGY: self.last_energy.serialize()}
 
     @property
     def unit_of_measurement(self) -> str:
@@ -443,10 +588,22 @@ class Cost(SensorEntity, RestoreEntity):
             )
         return self._attr_unit_of_measurement
 
+    def stored_history(self) -> dict:
+        """Last energy reading to persist in the history store"""
+        return {LAST_ENERGY: self.last_energy.pack()}
+
     async def async_added_to_hass(self) -> None:
         """Restore last state if same date"""
         _LOGGER.debug("Trying to restore %s", self._name)
         await super().async_added_to_hass()
+        self._async_track_sources()
+        self._history_store = async_get_history_store(
+            self.hass, self.config.get(CONF_UNIQUE_ID)
+        )
+        history = await self._history_store.async_load("cost")
+        self.async_on_remove(
+            self._history_store.async_register("cost", self.stored_history)
+        )
         if (
             (last_state := await self.async_get_last_state())
             and last_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE)
@@ -467,30 +624,68 @@ class Cost(SensorEntity, RestoreEntity):
             )
             if self.attr[LAST_UPDATED].date() == dt.now().date():
                 self._state = float(last_state.state)
-                self.attr[LAST_ENERGY] = last_state.attributes[LAST_ENERGY]
+                if history.get(LAST_ENERGY):
+                    self.last_energy.unpack(history[LAST_ENERGY])
+                else:
+                    self.last_energy.restore(last_state.attributes[LAST_ENERGY])
                 _LOGGER.debug("Restored %s", self._name)
             else:
                 self._state = 0
+        async_start_backfill(self, self._async_backfill)
+
+    async def _async_backfill(self, backfill: RecorderBackfill) -> None:
+        """Adds the cost of today's hours without readings from the recorder"""
+        now = dt.now()
+        if (first := day_gap(self.last_energy, now)) is None:
+            return
+        last = hour_index(now) - 1
+        last_time, last_value = self.last_energy.time, self.last_energy.value
+        states = await backfill.async_history(
+            [self._energy_entity, self._price_entity], hour_start(first - 1)
+        )
+        if self.last_energy.time != last_time:
+            # An update has already counted the gap
+            _LOGGER.debug("%s - Updated during backfill, skipping", self._name)
+            return
+
+        # The reading before the gap is the last reading, or the start of the day
+        samples = hourly_samples(states[self._energy_entity], first - 1, last)
+        prices = hourly_samples(states[self._price_entity], first, last)
+        start_value = samples.pop(first - 1, None)
+        if not samples:
+            return
+        if last_time is None or last_time.date() != now.date():
+            self._state = 0
+            last_value = start_value
+        cost = sum(
+            prices[hour] * usage
+            for hour, usage in usage_since(last_value, samples)
+            if hour in prices
+        )
+        self._state = round((self._state or 0) + cost, 2)
+        newest = max(samples)
+        self.last_energy.set(hour_start(newest + 1), samples[newest])
+        _LOGGER.debug("%s - Backfilled cost: %s", self._name, self._state)
+        self.async_write_ha_state()
+        self._history_store.async_schedule_save()
+
+    @callback
+    def _async_track_sources(self) -> None:
+        """Starts event driven updates if the entity is not polled"""
+        if not self.should_poll:
+            async_track_sources(self, [self._energy_entity, self._price_entity])
 
     def process_new_data(self):
         """Processes the update data"""
         now = dt.now()
 
-        # Parse datetimes from strings
-        self.attr[LAST_ENERGY] = {
-            dt.parse_datetime(key): value
-            for key, value in self.attr[LAST_ENERGY].items()
-            if isinstance(key, str)
-        }
-
         # Add current energy
-        self.attr[LAST_ENERGY][now] = self.energy.state
-        _LOGGER.debug(
-            "Cost calc for %s - Last energy: %s", self.name, self.attr[LAST_ENERGY]
-        )
+        readings = self.last_energy.readings(now, self.energy.state)
+        self.last_energy.set(now, self.energy.state)
+        _LOGGER.debug("Cost calc for %s - Last energy: %s", self.name, readings)
 
         # Calculate energy usage
-        self.energy_usage = calculate_energy_usage(self.attr[LAST_ENERGY])
+        self.energy_usage = calculate_energy_usage(readings)
         _LOGGER.debug(
             "Cost calc for %s - Energy usage: %s", self.name, self.energy_usage
         )
@@ -501,22 +696,12 @@ class Cost(SensorEntity, RestoreEntity):
         cost = self.price.state * self.energy_usage
 
         # Check new date
-        if (
-            min(self.attr[LAST_ENERGY]).date() != max(self.attr[LAST_ENERGY]).date()
-            or self._state is None
-        ):
+        if min(readings).date() != max(readings).date() or self._state is None:
             self._state = round(cost, 2)
         else:
             self._state = round(self._state + cost, 2)
         _LOGGER.debug("%s - Cost: %s", self._name, self._state)
 
-        # Clean old data
-        self.attr[LAST_ENERGY] = {
-            time: value
-            for (time, value) in self.attr[LAST_ENERGY].items()
-            if time == now
-        }
-
         return
 
     async def async_update(self):
@@ -548,13 +733,8 @@ class Cost(SensorEntity, RestoreEntity):
             _LOGGER.exception("%s - Could not fetch price and energy data", self._name)
         else:
             self.process_new_data()
-
-            # Datetimes needs to be converted to strings in state attributes
-            self.attr[LAST_ENERGY] = {
-                key.strftime("%Y-%m-%dT%H:%M:%S%z"): val
-                for key, val in self.attr[LAST_ENERGY].items()
-            }
             self.attr[LAST_UPDATED] = dt.now()
+            self._history_store.async_schedule_save()
 
 
 class PotentialSavings(SensorEntity, RestoreEntity):
@@ -562,8 +742,9 @@ class PotentialSavings(SensorEntity, RestoreEntity):
 
     _attr_state_class = SensorStateClass.MEASUREMENT
 
-    def __init__(self, hass, config):
+    def __init__(self, hass, config, update_mode=UPDATE_MODE_POLLING):
         self._attr_icon: str = ICON_SAVINGS
+        self._attr_should_poll = update_mode == UPDATE_MODE_POLLING
         self._attr_unit_of_measurement = None
         self._attr_unique_id = f"{config.get(CONF_UNIQUE_ID)}_potential_savings"
         self._hass = hass
@@ -574,11 +755,14 @@ class PotentialSavings(SensorEntity, RestoreEntity):
             COST_MIN: None,
             COST_MAX: None,
             ENERGY_TODAY: None,
-            LAST_ENERGY: {},
             LAST_UPDATED: None,
-            PRICES: {},
             QUALITY: None,
         }
+        self.last_energy = LastReading()
+        self._history_store: HistoryStore | None = None
+        self._price_coordinator: PriceCoordinator | None = None
+        self._prices = SlidingWindowAggregate()
+        self._prices_revision: int | None = None
         self.config = config
         self.cost_uid = f"{config.get(CONF_UNIQUE_ID)}_cost"
         self.cost = None
@@ -610,17 +794,53 @@ class PotentialSavings(SensorEntity, RestoreEntity):
 
     @property
     def extra_state_attributes(self):
-        return self.attr
+        return {
+            **self.attr,
+            LAST_ENERGY: self.last_energy.serialize(),
+            PRICES: self.serialized_prices(),
+        }
 
     @property
     def unit_of_measurement(self) -> str:
         """Return the unit of measurement."""
         return self._attr_unit_of_measurement
 
+    @staticmethod
+    def price_window() -> tuple[int, int]:
+        """First and last hour of the current day prices"""
+        now = dt.now()
+        return hour_index(dt.start_of_local_day(now)), hour_index(now)
+
+    def serialized_prices(self) -> dict:
+        """Current day prices with string keys"""
+        if self._price_coordinator is None:
+            return {}
+        return self._price_coordinator.serialized(*self.price_window())
+
+    def stored_history(self) -> dict:
+        """Current day prices and last energy reading to persist in the history store"""
+        return {
+            LAST_ENERGY: self.last_energy.pack(),
+            PRICES: self._price_coordinator.packed(*self.price_window()),
+        }
+
     async def async_added_to_hass(self) -> None:
         """Restore last state if same date"""
         _LOGGER.debug("Trying to restore %s", self._name)
         await super().async_added_to_hass()
+        self._async_track_sources()
+        self._price_coordinator = async_get_price_coordinator(
+            self.hass, self.price_entity
+        )
+        # A day is at most 25 hours when leaving daylight saving time
+        self.async_on_remove(self._price_coordinator.async_subscribe(25))
+        self._history_store = async_get_history_store(self.hass, self.score_uid)
+        history = await self._history_store.async_load("savings")
+        if PRICES in history:
+            self._price_coordinator.async_unpack(history[PRICES])
+        self.async_on_remove(
+            self._history_store.async_register("savings", self.stored_history)
+        )
         if (
             (last_state := await self.async_get_last_state())
             and last_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE)
@@ -647,30 +867,83 @@ class PotentialSavings(SensorEntity, RestoreEntity):
                     COST_MIN,
                     COST_MAX,
                     ENERGY_TODAY,
-                    LAST_ENERGY,
-                    PRICES,
                     QUALITY,
                 ]:
                     if attribute in last_state.attributes:
                         self.attr[attribute] = last_state.attributes[attribute]
+                if history.get(LAST_ENERGY):
+                    self.last_energy.unpack(history[LAST_ENERGY])
+                else:
+                    # Migrate history recorded as attributes by older versions
+                    self.last_energy.restore(last_state.attributes.get(LAST_ENERGY, {}))
+                    self._price_coordinator.async_restore(
+                        last_state.attributes.get(PRICES, {})
+                    )
             else:
                 self._state = 0
             _LOGGER.debug("Restored %s", self._name)
+        async_start_backfill(self, self._async_backfill)
+
+    async def _async_backfill(self, backfill: RecorderBackfill) -> None:
+        """Adds today's prices and energy without readings from the recorder"""
+        now = dt.now()
+        if (first := day_gap(self.last_energy, now)) is None:
+            return
+        last = hour_index(now) - 1
+        last_time, last_value = self.last_energy.time, self.last_energy.value
+        states = await backfill.async_history(
+            [self.energy_entity, self.price_entity], hour_start(first - 1)
+        )
+        self._price_coordinator.async_backfill(
+            hourly_samples(states[self.price_entity], first, last)
+        )
+        if self.last_energy.time != last_time:
+            # An update has already counted the energy of the gap
+            _LOGGER.debug("%s - Updated during backfill, skipping", self._name)
+            self.async_schedule_update_ha_state(True)
+            return
+
+        samples = hourly_samples(states[self.energy_entity], first - 1, last)
+        start_value = samples.pop(first - 1, None)
+        if not samples:
+            self.async_schedule_update_ha_state(True)
+            return
+        if last_time is None or last_time.date() != now.date():
+            self.attr[ENERGY_TODAY] = 0
+            last_value = start_value
+        self.attr[ENERGY_TODAY] = round(
+            (self.attr[ENERGY_TODAY] or 0)
+            + sum(usage for _, usage in usage_since(last_value, samples)),
+            2,
+        )
+        newest = max(samples)
+        self.last_energy.set(hour_start(newest + 1), samples[newest])
+        _LOGGER.debug(
+            "%s - Backfilled energy today: %s", self._name, self.attr[ENERGY_TODAY]
+        )
+        self._history_store.async_schedule_save()
+        # Costs are recalculated from the backfilled prices and energy
+        self.async_schedule_update_ha_state(True)
+
+    @callback
+    def _async_track_sources(self) -> None:
+        """Starts event driven updates if the entity is not polled.
+        The cost entity is tracked as well, as savings are derived from it."""
+        if self.should_poll:
+            return
+        sources = [self.energy_entity, self.price_entity]
+        cost_entity = er.async_get(self.hass).async_get_entity_id(
+            "sensor", DOMAIN, self.cost_uid
+        )
+        if cost_entity is not None:
+            sources.append(cost_entity)
+        async_track_sources(self, sources)
 
     def process_new_data(self):
         """Processes the update data"""
         # Fist part similar to cost sensor. Simplify?
         now = dt.now()
 
-        # Parse datetimes from strings
-        for i in [LAST_ENERGY, PRICES]:
-            if self.attr[i] is not None:
-                self.attr[i] = {
-                    dt.parse_datetime(key): value
-                    for key, value in self.attr[i].items()
-                    if isinstance(key, str)
-                }
-
         # Reset cost if last update was another day
         last_cost = self.cost.attributes.get("last_updated")
         if last_cost is not None and last_cost.date() != now.date():
@@ -678,23 +951,20 @@ class PotentialSavings(SensorEntity, RestoreEntity):
             _LOGGER.debug("%s - Updated cost to 0", self._name)
 
         # Find current day prices
-        self.attr[PRICES][
-            now.replace(minute=0, second=0, microsecond=0)
-        ] = self.price.state
-        self.attr[PRICES] = {
-            time: value
-            for (time, value) in self.attr[PRICES].items()
-            if time.date() == now.date()
-        }
+        self._price_coordinator.async_set_price(
+            hour_index(now), round(self.price.state, 2)
+        )
+        self._update_prices()
 
         # Calculate energy usage
-        self.attr[LAST_ENERGY][now] = self.energy.state
-        energy_usage = calculate_energy_usage(self.attr[LAST_ENERGY])
+        readings = self.last_energy.readings(now, self.energy.state)
+        self.last_energy.set(now, self.energy.state)
+        energy_usage = calculate_energy_usage(readings)
         _LOGGER.debug("%s - Energy usage: %s", self._name, energy_usage)
-        if energy_usage is None or len(self.attr[PRICES]) == 0:
+        if energy_usage is None or not self._prices.count:
             return
         if (
-            min(self.attr[LAST_ENERGY]).date() != max(self.attr[LAST_ENERGY]).date()
+            min(readings).date() != max(readings).date()
             or self.attr[ENERGY_TODAY] is None
         ):
             self.attr[ENERGY_TODAY] = round(energy_usage, 2)
@@ -703,17 +973,10 @@ class PotentialSavings(SensorEntity, RestoreEntity):
 
         # Calculate costs
         self.attr[COST_AVG] = round(
-            sum(self.attr[PRICES].values())
-            / len(self.attr[PRICES].values())
-            * self.attr[ENERGY_TODAY],
-            2,
-        )
-        self.attr[COST_MIN] = round(
-            min(self.attr[PRICES].values()) * self.attr[ENERGY_TODAY], 2
-        )
-        self.attr[COST_MAX] = round(
-            max(self.attr[PRICES].values()) * self.attr[ENERGY_TODAY], 2
+            self._prices.sum / self._prices.count * self.attr[ENERGY_TODAY], 2
         )
+        self.attr[COST_MIN] = round(self._prices.min * self.attr[ENERGY_TODAY], 2)
+        self.attr[COST_MAX] = round(self._prices.max * self.attr[ENERGY_TODAY], 2)
         _LOGGER.debug(
             "%s - Calculated costs - Avg: %s, Max: %s, Min: %s",
             self._name,
@@ -731,14 +994,21 @@ class PotentialSavings(SensorEntity, RestoreEntity):
         _LOGGER.debug("%s - Potential Savings: %s", self._name, self._state)
 
         # Calculate quality
-        self.attr[QUALITY] = round(len(self.attr[PRICES]) / (now.hour + 1), 2)
-
-        # Clean old data
-        self.attr[LAST_ENERGY] = {
-            time: value
-            for (time, value) in self.attr[LAST_ENERGY].items()
-            if time == now
-        }
+        self.attr[QUALITY] = round(self._prices.count / (now.hour + 1), 2)
+
+    def _update_prices(self) -> None:
+        """Adds the current hour price to the current day statistics.
+        The day is reloaded when older prices have changed."""
+        start, end = self.price_window()
+        if self._prices_revision != self._price_coordinator.revision:
+            self._prices.clear()
+            values, present = self._price_coordinator.window(start, end)
+            for offset in np.flatnonzero(present):
+                self._prices.set(start + int(offset), float(values[offset]))
+            self._prices_revision = self._price_coordinator.revision
+        else:
+            self._prices.set(end, self._price_coordinator.prices.get(end))
+            self._prices.evict(start)
 
     async def async_update(self):
         """Updates the potential sensor"""
@@ -781,16 +1051,5 @@ class PotentialSavings(SensorEntity, RestoreEntity):
             _LOGGER.exception("%s - Possibly non-numeric source state", self._name)
         else:
             self.process_new_data()
-
-            # Datetimes needs to be converted to strings in state attributes
-            self.attr[LAST_ENERGY] = {
-                key.strftime("%Y-%m-%dT%H:%M:%S%z"): val
-                for key, val in self.attr[LAST_ENERGY].items()
-            }
-
-            self.attr[PRICES] = {
-                key.strftime("%Y-%m-%dT%H:%M:%S%z"): val
-                for key, val in self.attr[PRICES].items()
-            }
-
-            self.attr[LAST_UPDATED] = dt.now().strftime("%Y-%m-%dT%H:%M:%S%z")
+            self.attr[LAST_UPDATED] = serialize_time(dt.now())
+            self._history_store.async_schedule_save()
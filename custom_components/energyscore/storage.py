@@ -0,0 +1,116 @@
+"""Persistent history storage for EnergyScore"""
+import asyncio
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import DOMAIN, ENERGY, HISTORY_STORES, PRICES
+from .history import pack_attribute
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Version 1: series keyed by datetime strings, as in the state attributes
+# Version 2: packed series, see history.pack_series
+STORAGE_VERSION = 2
+
+# Seconds to collect updates over before the history is written
+SAVE_DELAY = 60
+
+
+class HistoryStorage(Store):
+    """Store migrating the history of older versions"""
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict
+    ) -> dict:
+        if old_major_version == 1:
+            _LOGGER.debug("Migrating %s to packed series", self.key)
+            old_data = {
+                sensor: {
+                    key: pack_attribute(value) if key in (ENERGY, PRICES) else value
+                    for key, value in history.items()
+                }
+                for sensor, history in old_data.items()
+            }
+        return old_data
+
+
+def storage_key(unique_id: str) -> str:
+    """Storage key of an EnergyScore instance"""
+    return f"{DOMAIN}.{slugify(unique_id)}"
+
+
+@callback
+def async_get_history_store(hass: HomeAssistant, unique_id: str) -> "HistoryStore":
+    """Returns the history store shared by the sensors of an instance"""
+    stores = hass.data.setdefault(DOMAIN, {}).setdefault(HISTORY_STORES, {})
+    if unique_id not in stores:
+        stores[unique_id] = HistoryStore(hass, unique_id)
+    return stores[unique_id]
+
+
+async def async_remove_history(hass: HomeAssistant, unique_id: str) -> None:
+    """Removes the stored history of an instance"""
+    stores = hass.data.get(DOMAIN, {}).get(HISTORY_STORES, {})
+    if (history := stores.pop(unique_id, None)) is not None:
+        await history.async_remove()
+    else:
+        store = HistoryStorage(hass, STORAGE_VERSION, storage_key(unique_id))
+        await store.async_remove()
+
+
+class HistoryStore:
+    """Rolling history of the sensors of one EnergyScore instance.
+    Each sensor registers a function providing its history. Saves are delayed,
+    so all updates within SAVE_DELAY seconds are written once.
+    The store outlives its sensors, so a reload continues from memory."""
+
+    def __init__(self, hass: HomeAssistant, unique_id: str) -> None:
+        self.hass = hass
+        self.unique_id = unique_id
+        self._data: dict[str, dict] = {}
+        self._load_task: asyncio.Task | None = None
+        self._providers: dict[str, Callable[[], dict]] = {}
+        self._save_scheduled = False
+        self._store = HistoryStorage(hass, STORAGE_VERSION, storage_key(unique_id))
+
+    async def async_load(self, key: str) -> dict:
+        """Loads the stored history of a sensor, reading the file only once"""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._store.async_load())
+        if (data := await self._load_task) is not None and not self._data:
+            self._data = data
+        return self._data.get(key, {})
+
+    @callback
+    def async_register(self, key: str, provider: Callable[[], dict]) -> Callable:
+        """Registers the history provider of a sensor"""
+        self._providers[key] = provider
+
+        @callback
+        def _async_unregister() -> None:
+            # Keep the latest history for saves that are still pending
+            self._data[key] = self._providers.pop(key)()
+
+        return _async_unregister
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Saves the history after SAVE_DELAY, unless a save is already pending"""
+        if not self._save_scheduled:
+            self._save_scheduled = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Cancels pending saves and removes the stored history"""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_scheduled = False
+        for key, provider in self._providers.items():
+            self._data[key] = provider()
+        return self._data
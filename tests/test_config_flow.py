@@ -136,3 +136,4 @@ async def test_options_flow_add_treshold(hass):
 
     energy_treshold = config_entry.options.get("energy_treshold")
     assert energy_treshold == 2.3
+    assert config_entry.options.get("update_mode") == "polling"
@@ -0,0 +1,164 @@
+"""Scoring engine tests for EnergyScore"""
+
+import random
+
+import numpy as np
+
+from custom_components.energyscore.engine import (
+    ScoreAccumulator,
+    SlidingWindowAggregate,
+    load_accumulators,
+)
+from custom_components.energyscore.history import HourlyRingBuffer
+from custom_components.energyscore.sensor import normalise_energy, normalise_price
+
+
+def full_score(totals: HourlyRingBuffer, prices: dict, end: int, hours: int):
+    """Score of the window recomputed with the normalisation functions"""
+    usage = {}
+    for hour in range(end - hours + 1, end + 1):
+        if hour in totals and hour - 1 in totals:
+            previous, current = totals.get(hour - 1), totals.get(hour)
+            if current is None:
+                continue
+            if previous is None or current < previous:
+                usage[hour] = current
+            else:
+                usage[hour] = current - previous
+    window = {hour: price for hour, price in prices.items() if hour > end - hours}
+    norm_prices = normalise_price(window)
+    norm_energy = normalise_energy(usage)
+    return sum(
+        norm_prices[hour] * norm_energy[hour] for hour in usage if hour in norm_prices
+    )
+
+
+def test_incremental_score_matches_full_recompute() -> None:
+    """Test the running sums against the normalised dicts over random updates"""
+    random.seed(42)
+    hours = 24
+    accumulator = ScoreAccumulator(hours, 0)
+    totals = HourlyRingBuffer(hours + 1)
+    prices = {}
+    total = 0
+    for hour in range(1000, 1200):
+        if random.random() < 0.1:
+            continue  # Missing hour
+        for _ in range(random.randint(1, 3)):  # Several updates within an hour
+            total = round(total + random.uniform(0, 3), 2)
+            if random.random() < 0.05:
+                total = round(random.uniform(0, 1), 2)  # Resetting sensor
+            totals.set(hour, total)
+            prices[hour] = round(random.uniform(-0.5, 3), 2)
+
+            accumulator.advance(hour)
+            accumulator.set_reading(hour, total)
+            accumulator.set_usage(hour, totals.get(hour - 1), total)
+            accumulator.set_price(hour, prices[hour])
+            expected = full_score(totals, prices, hour, hours)
+            assert np.isclose(accumulator.score(), expected)
+
+
+def test_load_matches_incremental() -> None:
+    """Test that loading a window gives the same result as building it up"""
+    hours = 4
+    accumulator = ScoreAccumulator(hours, 0.5)
+    totals = HourlyRingBuffer(hours + 1)
+    prices = HourlyRingBuffer(hours)
+    for hour, total, price in [
+        (10, 1.0, 0.3),
+        (11, 2.2, 0.1),
+        (12, None, 0.4),
+        (13, 0.4, 0.2),
+        (14, 1.6, 0.6),
+    ]:
+        totals.set(hour, total)
+        prices.set(hour, price)
+        accumulator.advance(hour)
+        accumulator.set_reading(hour, np.nan if total is None else total)
+        previous = totals.get(hour - 1)
+        if previous is None and hour - 1 in totals:
+            previous = np.nan
+        accumulator.set_usage(hour, previous, np.nan if total is None else total)
+        accumulator.set_price(hour, price)
+
+    loaded = ScoreAccumulator(hours, 0.5)
+    loaded.load(14, totals.view(14, hours + 1), prices.view(14, hours))
+    assert loaded.usage_hours == accumulator.usage_hours == 2
+    assert loaded.price_hours == accumulator.price_hours == 4
+    assert loaded.distinct_readings == accumulator.distinct_readings == 5
+    assert np.isclose(loaded.score(), accumulator.score())
+    # Usage of 1.2 at 0.1 and 1.2 at 0.6, the price range is 0.1 to 0.6
+    assert np.isclose(loaded.score(), 0.5)
+
+
+def test_extremes_leaving_window() -> None:
+    """Test that the minimum and maximum are recomputed when they are evicted"""
+    accumulator = ScoreAccumulator(2, 0)
+    for hour, price in enumerate([5.0, 1.0, 2.0, 3.0]):
+        accumulator.advance(hour)
+        accumulator.set_reading(hour, hour)
+        accumulator.set_usage(hour, hour - 1 if hour else None, hour)
+        accumulator.set_price(hour, price)
+    # Prices 2 and 3 with equal usage
+    assert accumulator.score() == 0.5
+    assert accumulator._price_window.min == 2.0
+    assert accumulator._price_window.max == 3.0
+
+
+def test_sliding_window_aggregate() -> None:
+    """Test the sliding window statistics against the values in the window"""
+    random.seed(7)
+    window = SlidingWindowAggregate()
+    assert window.min is None and window.max is None
+    assert window.sum == 0 and window.count == 0
+    values = {}
+    for time in range(200):
+        for _ in range(random.randint(1, 3)):  # The newest value is replaced
+            values[time] = round(random.uniform(-1, 4), 2)
+            window.set(time, values[time])
+        start = time - random.randint(0, 24)
+        window.evict(start)
+        expected = [value for key, value in values.items() if key >= start]
+        assert window.min == min(expected)
+        assert window.max == max(expected)
+        assert np.isclose(window.sum, sum(expected))
+        assert window.count == len(expected)
+        values = {key: value for key, value in values.items() if key >= start}
+
+    # Older values rebuild the window
+    window.set(min(values) - 1, 100)
+    assert window.max == 100
+    assert list(window.items())[0] == (min(values) - 1, 100)
+
+
+def test_batch_load() -> None:
+    """Test that a batch gives the same windows as building each one up"""
+    random.seed(3)
+    hours = 6
+    prices = HourlyRingBuffer(hours)
+    rows = [(HourlyRingBuffer(hours + 1), ScoreAccumulator(hours, t)) for t in (0, 1.5)]
+    for hour in range(20):
+        prices.set(hour, round(random.uniform(0, 2), 2))
+        for totals, accumulator in rows:
+            total = totals.get(hour - 1) or 0
+            totals.set(hour, round(total + random.uniform(0, 2), 2))
+            accumulator.advance(hour)
+            accumulator.set_reading(hour, totals.get(hour))
+            accumulator.set_usage(hour, totals.get(hour - 1), totals.get(hour))
+            accumulator.set_price(hour, prices.get(hour))
+
+    batch = [ScoreAccumulator(hours, t) for t in (0, 1.5)]
+    views = [totals.view(19, hours + 1) for totals, _ in rows]
+    load_accumulators(
+        batch,
+        19,
+        np.stack([values for values, _ in views]),
+        np.stack([present for _, present in views]),
+        *prices.view(19, hours),
+    )
+    for (_, accumulator), loaded in zip(rows, batch):
+        assert loaded.usage_hours == accumulator.usage_hours
+        assert loaded.distinct_readings == accumulator.distinct_readings
+        assert np.isclose(loaded.score(), accumulator.score())
+    assert batch[0].usage_hours > batch[1].usage_hours
@@ -0,0 +1,156 @@
+"""History buffer tests for EnergyScore"""
+
+import numpy as np
+
+from homeassistant.util import dt
+
+from custom_components.energyscore.history import (
+    HourlyRingBuffer,
+    LastReading,
+    hour_index,
+    hour_start,
+    pack_attribute,
+    unpack_series,
+)
+
+
+def test_hour_index() -> None:
+    """Test conversion between datetimes and integer UTC hours"""
+    time = dt.parse_datetime("2022-09-18T13:00:00-07:00")
+    assert hour_index(time) == 462092
+    assert hour_index(time.replace(minute=59)) == 462092
+    assert hour_start(462092) == time
+
+
+def test_ring_buffer_evicts_old_hours() -> None:
+    """Test that the ring buffer keeps the newest hours only"""
+    buffer = HourlyRingBuffer(3)
+    for hour in range(10, 15):
+        buffer.set(hour, hour * 1.5)
+    assert len(buffer) == 3
+    assert 11 not in buffer
+    assert buffer.get(12) == 18
+    assert list(buffer.items()) == [(12, 18), (13, 19.5), (14, 21)]
+
+    # Too old data is ignored
+    buffer.set(11, 2)
+    assert 11 not in buffer
+
+    # Gaps are missing
+    buffer.set(16, None)
+    assert list(buffer.items()) == [(14, 21), (16, None)]
+    assert 16 in buffer
+    assert buffer.get(16) is None
+
+
+def test_ring_buffer_view() -> None:
+    """Test that windows ending at the newest hour are views"""
+    buffer = HourlyRingBuffer(4)
+    for hour in [1, 2, 4, 5, 6]:
+        buffer.set(hour, hour)
+
+    values, present = buffer.view(6, 4)
+    assert np.shares_memory(values, buffer._values)
+    assert values[present].tolist() == [4, 5, 6]
+    assert present.tolist() == [False, True, True, True]
+
+    values, present = buffer.view(5, 2)
+    assert values.tolist() == [4, 5]
+    assert present.all()
+
+
+def test_ring_buffer_serialize_and_restore() -> None:
+    """Test that the buffer round trips through state attribute strings"""
+    data = {
+        "2022-09-18T13:00:00-0700": 122.39,
+        "2022-09-18T14:00:00-0700": None,
+        "2022-09-18T15:00:00-0700": 123.1,
+    }
+    buffer = HourlyRingBuffer(25)
+    buffer.restore(data)
+    assert buffer.serialize() == data
+    assert buffer.serialize(buffer.last_hour, 2) == {
+        "2022-09-18T14:00:00-0700": None,
+        "2022-09-18T15:00:00-0700": 123.1,
+    }
+
+    buffer.resize(2)
+    assert buffer.serialize() == {
+        "2022-09-18T14:00:00-0700": None,
+        "2022-09-18T15:00:00-0700": 123.1,
+    }
+
+
+def test_serialization_is_cached() -> None:
+    """Test that the serialized view is reused until the data changes"""
+    buffer = HourlyRingBuffer(3)
+    buffer.set(10, 1.2)
+    serialized = buffer.serialize()
+    assert buffer.serialize() is serialized
+    buffer.set(11, 1.4)
+    assert buffer.serialize() is not serialized
+    assert len(buffer.serialize()) == 2
+
+
+def test_last_reading() -> None:
+    """Test the last energy reading of the cost and savings sensors"""
+    reading = LastReading()
+    assert reading.serialize() == {}
+
+    # Restored data is kept as is until there is a new reading
+    restored = {"2022-09-18 11:10:44-07:00": 4.2}
+    reading.restore(restored)
+    assert reading.serialize() is restored
+    assert reading.value == 4.2
+
+    time = dt.parse_datetime("2022-09-18T12:10:44-07:00")
+    assert reading.readings(time, 5.0) == {reading.time: 4.2, time: 5.0}
+    reading.set(time, 5.0)
+    assert reading.serialize() == {"2022-09-18T12:10:44-0700": 5.0}
+
+
+def test_pack_series() -> None:
+    """Test that the packed series round trips, including gaps and rejected hours"""
+    buffer = HourlyRingBuffer(6)
+    for hour, value in [(10, 1.2), (11, None), (13, 2.5)]:
+        buffer.set(hour, value)
+
+    packed = buffer.pack()
+    assert packed["start"] == 10 * 3600
+    assert packed["resolution"] == 3600
+    start, values, present = unpack_series(packed)
+    assert start == 10
+    assert present.tolist() == [True, True, False, True]
+
+    restored = HourlyRingBuffer(6)
+    assert restored.unpack(packed) == 13
+    assert list(restored.items()) == [(10, 1.2), (11, None), (13, 2.5)]
+    assert unpack_series(HourlyRingBuffer(3).pack())[1].size == 0
+
+
+def test_pack_attribute() -> None:
+    """Test migration from the attribute layout"""
+    data = {
+        "2022-09-18T15:00:00-0700": 123.1,
+        "2022-09-18T13:00:00-0700": 122.39,
+    }
+    buffer = HourlyRingBuffer(25)
+    buffer.unpack(pack_attribute(data))
+    assert buffer.serialize() == {
+        "2022-09-18T13:00:00-0700": 122.39,
+        "2022-09-18T15:00:00-0700": 123.1,
+    }
+    assert unpack_series(pack_attribute({}))[1].size == 0
+
+
+def test_pack_last_reading() -> None:
+    """Test that the last reading round trips as an epoch"""
+    reading = LastReading()
+    assert reading.pack() == {}
+    time = dt.parse_datetime("2022-09-18T12:10:44-07:00")
+    reading.set(time, 5.0)
+
+    restored = LastReading()
+    restored.unpack(reading.pack())
+    assert restored.time == time
+    assert restored.value == 5.0
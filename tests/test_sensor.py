@@ -5,6 +5,7 @@ Neat testing in groups: https://github.com/home-assistant/core/blob/dev/tests/co
 
 import copy
 import datetime
+from unittest.mock import MagicMock, patch
 import pytest
 
 from freezegun import freeze_time
@@ -25,12 +26,24 @@ from pytest_homeassistant_custom_component.common import (
 )
 
 from custom_components.energyscore import config_flow
-from custom_components.energyscore.const import ENERGY, PRICES, QUALITY
+from custom_components.energyscore.backfill import BACKFILL_DELAY
+from custom_components.energyscore.const import (
+    DOMAIN,
+    ENERGY,
+    LAST_ENERGY,
+    PRICE_COORDINATORS,
+    PRICES,
+    QUALITY,
+)
+from custom_components.energyscore.history import hour_index, unpack_series
+from custom_components.energyscore.recorder import exclude_attributes
 from custom_components.energyscore.sensor import (
+    EVENT_COOLDOWN,
     SCAN_INTERVAL,
     normalise_energy,
     normalise_price,
 )
+from custom_components.energyscore.storage import SAVE_DELAY
 
 from .const import (
     EMPTY_DICT,
@@ -968,3 +981,197 @@ async def test_uom(hass: HomeAssistant, caplog, uom: str) -> None:
         )
         assert state_cost.attributes.get("unit_of_measurement") == None
         assert state_save.attributes.get("unit_of_measurement") == None
+
+
+async def test_event_driven_update(hass: HomeAssistant) -> None:
+    """Test that event driven sensors update on source changes and new hours"""
+
+    CONFIG = copy.deepcopy(VALID_CONFIG)
+    CONFIG["sensor"]["update_mode"] = "event"
+
+    initial_datetime = dt.parse_datetime("2022-09-18 21:08:44+01:00")
+    with freeze_time(initial_datetime) as frozen_datetime:
+        assert await async_setup_component(hass, "sensor", CONFIG)
+        await hass.async_block_till_done()
+
+        # Polling does not update the sensors
+        hass.states.async_set("sensor.energy", TEST_PARAMS[0]["energy"])
+        hass.states.async_set("sensor.electricity_price", TEST_PARAMS[0]["price"])
+        async_fire_time_changed(hass, dt.now() + SCAN_INTERVAL)
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.my_mock_es_energyscore")
+        assert state.attributes.get("total_energy") == {"2022-09-18T13:00:00-0700": 0.2}
+
+        # Changes within the cooldown are coalesced into one update
+        hass.states.async_set("sensor.energy", 0.5)
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.my_mock_es_energyscore")
+        assert state.attributes.get("total_energy") == {"2022-09-18T13:00:00-0700": 0.2}
+        hass.states.async_set("sensor.energy", TEST_PARAMS[1]["energy"])
+        frozen_datetime.tick(delta=datetime.timedelta(seconds=EVENT_COOLDOWN))
+        async_fire_time_changed(hass, dt.now())
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.my_mock_es_energyscore")
+        assert state.attributes.get("total_energy") == {"2022-09-18T13:00:00-0700": 1}
+        assert hass.states.get("sensor.my_mock_es_cost").state == "0.32"
+
+        # A new hour updates the sensors even without source changes
+        frozen_datetime.tick(delta=datetime.timedelta(minutes=50, seconds=46))
+        async_fire_time_changed(hass, dt.now())
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.my_mock_es_energyscore")
+        assert state.attributes.get("total_energy") == {
+            "2022-09-18T13:00:00-0700": 1,
+            "2022-09-18T14:00:00-0700": 1,
+        }
+
+
+async def test_shared_price_coordinator(hass: HomeAssistant) -> None:
+    """Test that instances with the same price entity share one price timeline"""
+
+    initial_datetime = dt.parse_datetime("2022-09-18 21:08:44+01:00")
+    with freeze_time(initial_datetime) as frozen_datetime:
+        assert await async_setup_component(hass, "sensor", VALID_CONFIG_2)
+        await hass.async_block_till_done()
+
+        coordinators = hass.data[DOMAIN][PRICE_COORDINATORS]
+        assert list(coordinators) == ["sensor.electricity_price"]
+
+        for hour in range(0, 3):
+            hass.states.async_set("sensor.energy", TEST_PARAMS[hour]["energy"])
+            hass.states.async_set("sensor.alternative_energy", hour)
+            hass.states.async_set(
+                "sensor.electricity_price", TEST_PARAMS[hour]["price"]
+            )
+            async_fire_time_changed(hass, dt.now() + SCAN_INTERVAL)
+            await hass.async_block_till_done()
+            frozen_datetime.tick(delta=datetime.timedelta(hours=1))
+
+        assert len(coordinators["sensor.electricity_price"].prices) == 3
+        mock = hass.states.get("sensor.my_mock_es_energyscore")
+        alternative = hass.states.get("sensor.my_alternative_es_energyscore")
+        assert mock.attributes[PRICES] == alternative.attributes[PRICES]
+        assert mock.attributes[PRICES] == {
+            "2022-09-18T13:00:00-0700": 0.4,
+            "2022-09-18T14:00:00-0700": 0.1,
+            "2022-09-18T15:00:00-0700": 0.15,
+        }
+        savings = hass.states.get("sensor.my_mock_es_potential_savings")
+        assert savings.attributes[PRICES] == mock.attributes[PRICES]
+
+
+async def test_history_store(hass: HomeAssistant, hass_storage) -> None:
+    """Test that the rolling history is saved to the history store with a delay"""
+
+    initial_datetime = dt.parse_datetime("2022-09-18 21:08:44+01:00")
+    with freeze_time(initial_datetime) as frozen_datetime:
+        assert await async_setup_component(hass, "sensor", VALID_CONFIG)
+        await hass.async_block_till_done()
+
+        hass.states.async_set("sensor.energy", TEST_PARAMS[0]["energy"])
+        hass.states.async_set("sensor.electricity_price", TEST_PARAMS[0]["price"])
+        async_fire_time_changed(hass, dt.now() + SCAN_INTERVAL)
+        await hass.async_block_till_done()
+        assert "energyscore.testing123" not in hass_storage
+
+        frozen_datetime.tick(delta=datetime.timedelta(seconds=SAVE_DELAY))
+        async_fire_time_changed(hass, dt.now() + SCAN_INTERVAL)
+        await hass.async_block_till_done()
+        stored = hass_storage["energyscore.testing123"]["data"]
+        hour = hour_index(dt.now())
+        for sensor, series in [
+            ("energyscore", ENERGY),
+            ("energyscore", PRICES),
+            ("savings", PRICES),
+        ]:
+            start, values, present = unpack_series(stored[sensor][series])
+            assert start == hour
+            assert present.tolist() == [True]
+        assert stored["cost"][LAST_ENERGY] == {
+            "time": initial_datetime.timestamp(),
+            "value": 0.2,
+        }
+
+    # The rolling history is not recorded in the database
+    assert exclude_attributes(hass) == {ENERGY, PRICES}
+
+
+async def test_restore_history_store(hass: HomeAssistant, hass_storage) -> None:
+    """Test restoring and migrating the rolling history from the history store"""
+    hass_storage["energyscore.testing123"] = {
+        "version": 1,
+        "key": "energyscore.testing123",
+        "data": {
+            "energyscore": {
+                ENERGY: {"2022-09-18T13:00:00-0700": 122.39},
+                PRICES: {"2022-09-18T13:00:00-0700": 0.99},
+            },
+        },
+    }
+
+    assert await async_setup_component(hass, "sensor", VALID_CONFIG)
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.my_mock_es_energyscore")
+    assert state.attributes.get(ENERGY) == {"2022-09-18T13:00:00-0700": 122.39}
+    assert state.attributes.get(PRICES) == {"2022-09-18T13:00:00-0700": 0.99}
+
+
+async def test_backfill_from_recorder(hass: HomeAssistant) -> None:
+    """Test that a new instance is backfilled from the recorded source history"""
+
+    initial_datetime = dt.parse_datetime("2022-09-18 21:08:44+01:00")
+    recorded = {"sensor.energy": [], "sensor.electricity_price": []}
+    for hour in range(0, 5):
+        time = initial_datetime + datetime.timedelta(hours=hour)
+        for entity_id, key in (
+            ("sensor.energy", "energy"),
+            ("sensor.electricity_price", "price"),
+        ):
+            recorded[entity_id].append(
+                State(entity_id, str(TEST_PARAMS[hour][key]), last_updated=time)
+            )
+
+    def get_significant_states(hass, start_time, entity_ids=None, **kwargs):
+        assert start_time <= initial_datetime
+        return {entity_id: recorded[entity_id] for entity_id in entity_ids}
+
+    hass.config.components.add("recorder")
+    recorder = MagicMock()
+    recorder.async_add_executor_job = hass.async_add_executor_job
+    with freeze_time(initial_datetime) as frozen_datetime, patch(
+        "custom_components.energyscore.backfill.get_instance", return_value=recorder
+    ), patch(
+        "custom_components.energyscore.backfill.history.get_significant_states",
+        side_effect=get_significant_states,
+    ) as mock_history:
+        frozen_datetime.tick(delta=datetime.timedelta(hours=5))
+        hass.states.async_set("sensor.energy", TEST_PARAMS[4]["energy"])
+        hass.states.async_set("sensor.electricity_price", TEST_PARAMS[4]["price"])
+
+        assert await async_setup_component(hass, "sensor", VALID_CONFIG)
+        await hass.async_block_till_done()
+        frozen_datetime.tick(delta=datetime.timedelta(seconds=BACKFILL_DELAY))
+        async_fire_time_changed(hass, dt.now())
+        await hass.async_block_till_done()
+
+        # One query for the backfill of all sensors
+        assert mock_history.call_count == 1
+
+        state = hass.states.get("sensor.my_mock_es_energyscore")
+        assert state.attributes[ENERGY] == {
+            "2022-09-18T13:00:00-0700": 0.2,
+            "2022-09-18T14:00:00-0700": 1,
+            "2022-09-18T15:00:00-0700": 2,
+            "2022-09-18T16:00:00-0700": 2,
+            "2022-09-18T17:00:00-0700": 3,
+            "2022-09-18T18:00:00-0700": 3,
+        }
+        assert len(state.attributes[PRICES]) == 6
+        assert state.attributes[QUALITY] == 0.17
+        assert state.state == "86"
+
+        # Cost and energy of the backfilled hours of the day
+        assert hass.states.get("sensor.my_mock_es_cost").state == "0.45"
+        savings = hass.states.get("sensor.my_mock_es_potential_savings")
+        assert savings.attributes["energy_today"] == 2.8